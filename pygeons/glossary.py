@@ -610,6 +610,16 @@ algorithm more sensitive. This should not be any lower than about 2.0.
 '''
 }
 #####################################################################
+WORKERS = {
+'type':int,
+'metavar':'INT',
+'help':
+''' 
+Number of subprocesses used to parse the station files. The stations 
+are parsed in the main process if this is 0, which is the default.
+'''
+}
+#####################################################################
 
 GLOSSARY = {
 'input_text_file':INPUT_TEXT_FILE,
@@ -674,4 +684,5 @@ GLOSSARY = {
 'network_fix':NETWORK_FIX,
 'station_fix':STATION_FIX,
 'outlier_tol':OUTLIER_TOL,
+'workers':WORKERS,
 }
@@ -7,7 +7,7 @@ import logging
 import h5py
 from pygeons.mjd import mjd_inv
 from pygeons.io.datacheck import check_data
-from pygeons.io.parser import PARSER_DICT
+from pygeons.io.parser import parse_many
 logger = logging.getLogger(__name__)
 
 ## Write files from DataDict instances
@@ -109,7 +109,7 @@ def hdf5_from_dict(outfile,data):
 
 ## Load DataDict instances from files
 #####################################################################
-def dict_from_text(infile,parser='csv'):
+def dict_from_text(infile,parser='csv',workers=0):
   ''' 
   Loads a data dictionary from a text file. 
   
@@ -122,6 +122,10 @@ def dict_from_text(infile,parser='csv'):
     String indicating which parser to use. Can be either "csv", 
     "pbocsv", "tdecsv", or "pbopos".
     
+  workers : int, optional
+    Number of subprocesses used to parse the stations. Defaults to 0, 
+    which parses the stations serially on the parent process.
+
   Returns
   -------
   out : dict
@@ -133,7 +137,7 @@ def dict_from_text(infile,parser='csv'):
   buff.close()
 
   # dictionaries of data for each station
-  dicts = [PARSER_DICT[parser](s) for s in strs]
+  dicts = parse_many(strs,parser,workers=workers)
 
   # find the earliest and latest time. note that these are in MJD
   start_time = np.inf
@@ -206,12 +206,13 @@ def pygeons_crop(input_file,start_date=None,stop_date=None,
   return
 
 
-def pygeons_toh5(input_text_file,file_type='csv',output_stem=None):
+def pygeons_toh5(input_text_file,file_type='csv',output_stem=None,
+                 workers=0):
   ''' 
   converts a text file to an hdf5 file
   '''
   logger.info('Running pygeons toh5 ...')
-  data = dict_from_text(input_text_file,parser=file_type)
+  data = dict_from_text(input_text_file,parser=file_type,workers=workers)
   if output_stem is None:
     output_stem = _remove_extension(input_text_file)
 
@@ -20,30 +20,60 @@ that is not in the text file.
 
 '''
 import numpy as np
+import pandas as pd
 import logging
-from pygeons.mjd import mjd
+import re
+from io import BytesIO
+from pygeons.mjd import mjd_array
+from pygeons.mp import parmap
 logger = logging.getLogger(__name__)  
 
-def _get_line_with(sub,master):
+# date formats, delimiters, and data columns used by the parsers
+_CSV_FMT = '%Y-%m-%d'
+_CSV_DELIM = ','
+_CSV_COLUMNS = (0,1,2,3,4,5,6)
+_TDECSV_COLUMNS = (0,1,2,3)
+_POS_FMT = '%Y%m%d'
+_POS_DELIM = ':'
+_POS_DATA_DELIM = r'\s+'
+_POS_COLUMNS = (0,15,16,17,18,19,20)
+
+# compiled regular expressions used to find lines containing a 
+# substring. This is populated by *_line_pattern*
+_LINE_PATTERNS = {}
+
+def _line_pattern(sub,flags=0):
   ''' 
-  gets line with the first occurrence of sub
+  returns a compiled regular expression which matches the entire line 
+  containing *sub*. *flags* are additional flags for *re.compile*. The 
+  compiled expressions are cached in *_LINE_PATTERNS*
+  '''
+  key = (sub,flags)
+  if key not in _LINE_PATTERNS:
+    _LINE_PATTERNS[key] = re.compile(r'^[^\n]*%s[^\n]*' % re.escape(sub),
+                                     re.MULTILINE | flags)
+
+  return _LINE_PATTERNS[key]
+
+
+def _find_line_with(sub,master,flags=0):
+  ''' 
+  returns the start and end index of the line with the first 
+  occurrence of sub
   '''
-  idx = master.find(sub)
-  if idx == -1:
+  # this finds the line in a single pass through *master*
+  match = _line_pattern(sub,flags).search(master)
+  if match is None:
     raise ValueError('Cannot find substring "%s"' % sub)
 
-  line_start = master.rfind('\n',0,idx)
-  if line_start == -1:
-    # this is if sub is on the first line
-    line_start = 0
-  else:
-    line_start += 1
+  return match.start(),match.end()
 
-  line_end = master.find('\n',line_start)
-  if line_end == -1:
-    # this is if sub is on the last line
-    line_end = len(master)
 
+def _get_line_with(sub,master):
+  ''' 
+  gets line with the first occurrence of sub
+  '''
+  line_start,line_end = _find_line_with(sub,master)
   return master[line_start:line_end]
 
 
@@ -61,10 +91,10 @@ def _get_field(field,master,delim=':'):
   # split by delimiter
   lst = line.split(delim)
   # find the index containing field
-  for i,j in enumerate(lst): 
-    if field in j: 
-      field_idx = i
-      break
+  try:
+    field_idx = next(i for i,j in enumerate(lst) if field in j)
+  except StopIteration:
+    raise ValueError('Cannot find the field "%s"' % field)
 
   # entry after the one containing field
   if (field_idx + 1) >= len(lst):
@@ -78,62 +108,104 @@ def _get_field(field,master,delim=':'):
   return out
 
 
-def parse_csv(file_str):
+def _get_data_start(field,master,delim=':'):
   ''' 
-  Reads data from a single PyGeoNS csv file
+  returns the index of the first character in the data block. The 
+  data block is assumed to start with a line beginning with the value 
+  associated with *field*, and it is searched for after the line 
+  containing *field*. This avoids scanning through the data block, 
+  which is most of *master*. *field* should be lowercase, and it is 
+  found in *master* without regard to case.
   '''
-  fmt = '%Y-%m-%d'
-  delim = ','
+  line_start,line_end = _find_line_with(field,master,re.IGNORECASE)
+  line = master[line_start:line_end].lower()
+  start = _get_field(field,line,delim=delim)
+  # only match *start* at the beginning of a line so that header values, 
+  # such as an end date which is the same as the begin date, are 
+  # skipped. Leading whitespace is allowed
+  pattern = re.compile(r'^\s*%s' % re.escape(start),re.MULTILINE)
+  match = pattern.search(master,line_end)
+  if match is None:
+    raise ValueError('Cannot find the start of the data block "%s"' % start)
 
-  def date_conv(date_str): 
-    # return a float, rather than an integer, to be consistent with 
-    # the other data types
-    return float(mjd(date_str,fmt))
+  return match.end() - len(start)
 
-  # make everything lowercase so that field searches are not case 
-  # sensitive
-  file_str = file_str.lower()
-  id = _get_field('4-character id',file_str,delim=delim)
+
+def _read_data(master,start,fmt,usecols,delim):
+  ''' 
+  Reads the data block, which begins at index *start* of *master*, 
+  with pandas. The first column in *usecols* is the date, which gets 
+  converted to an integer array of MJDs with the format string *fmt*. 
+  The remaining columns are returned as a float array.
+  '''
+  dtype = dict((i,np.float64) for i in usecols[1:])
+  dtype[usecols[0]] = str
+  data = master[start:]
+  if not isinstance(data,bytes):
+    # in Python 3 the data block needs to be encoded. A BytesIO shares 
+    # the memory of the encoded bytes, whereas a StringIO would copy 
+    # them into a buffer with four bytes per character
+    data = data.encode('utf-8')
+
+  buff = BytesIO(data)
+  df = pd.read_csv(buff,
+                   header=None,
+                   sep=delim,
+                   skipinitialspace=True,
+                   usecols=usecols,
+                   dtype=dtype,
+                   engine='c')
+  time = mjd_array(df.pop(usecols[0]).values,fmt)
+  # the remaining columns are all float64, so this is a view of their 
+  # values. Copy them if pandas returns a read-only view
+  data = df.values
+  if not data.flags.writeable:
+    data = data.copy()
+
+  return time,data
+
+
+def parse_csv(file_str):
+  ''' 
+  Reads data from a single PyGeoNS csv file
+  '''
+  # index of the first character in the data block
+  data_start_idx = _get_data_start('begin date',file_str,delim=_CSV_DELIM)
+  # only search the header for the remaining fields. Make the header 
+  # lowercase so that field searches are not case sensitive
+  header = file_str[:data_start_idx].lower()
+  id = _get_field('4-character id',header,delim=_CSV_DELIM)
   logger.debug('reading csv data for station %s' % id.upper()) 
 
-  lon_str = _get_field('longitude',file_str,delim=delim)
+  lon_str = _get_field('longitude',header,delim=_CSV_DELIM)
   lon,dir = lon_str.split()
   lon = float(lon)
-  if dir.upper() == 'W':
+  if dir == 'w':
     # make sure longitude component is east
     lon *= -1.0   
   
-  lat_str = _get_field('latitude',file_str,delim=delim)
+  lat_str = _get_field('latitude',header,delim=_CSV_DELIM)
   lat,dir = lat_str.split()
   lat = float(lat)
-  if dir.upper() == 'S':
+  if dir == 's':
     # make sure latitude component is north
     lat *= -1.0   
 
-  units = _get_field('units',file_str,delim=delim)
+  units = _get_field('units',header,delim=_CSV_DELIM)
   space_exponent = units.split()[0].split('**')[1]
   time_exponent = units.split()[1].split('**')[1]
-  start = _get_field('begin date',file_str,delim=delim)
-  # index of the first character in the data block
-  data_start_idx = file_str.rfind(start)
-  data = file_str[data_start_idx:]
-  data = np.genfromtxt(data.split('\n'),
-                       converters={0:date_conv},
-                       delimiter=delim,
-                       usecols=(0,1,2,3,4,5,6))
-  # make sure that the data set is a two-dimensional array
-  data = data.reshape((-1,7))
+  time,data = _read_data(file_str,data_start_idx,_CSV_FMT,_CSV_COLUMNS,_CSV_DELIM)
   output = {}
   output['id'] = id.upper()
-  output['longitude'] = np.float(lon)
-  output['latitude'] = np.float(lat)
-  output['time'] = data[:,0].astype(int)
-  output['north'] = data[:,1].astype(float)
-  output['east'] = data[:,2].astype(float)
-  output['vertical'] = data[:,3].astype(float)
-  output['north_std_dev'] = data[:,4].astype(float)
-  output['east_std_dev'] = data[:,5].astype(float)
-  output['vertical_std_dev'] = data[:,6].astype(float)
+  output['longitude'] = float(lon)
+  output['latitude'] = float(lat)
+  output['time'] = time
+  output['north'] = data[:,0]
+  output['east'] = data[:,1]
+  output['vertical'] = data[:,2]
+  output['north_std_dev'] = data[:,3]
+  output['east_std_dev'] = data[:,4]
+  output['vertical_std_dev'] = data[:,5]
   output['time_exponent'] = int(time_exponent)
   output['space_exponent'] = int(space_exponent)
   return output 
@@ -143,40 +215,30 @@ def parse_pbocsv(file_str):
   ''' 
   Reads data from a single PBO csv file
   '''
-  fmt = '%Y-%m-%d'
-  delim = ','
-
-  def date_conv(date_str): 
-    return float(mjd(date_str,fmt))
-
-  # make everything lowercase so that field searches are not case 
+  data_start_idx = _get_data_start('begin date',file_str,delim=_CSV_DELIM)
+  # make the header lowercase so that field searches are not case 
   # sensitive
-  file_str = file_str.lower()
-  id = _get_field('4-character id',file_str,delim=delim)
+  header = file_str[:data_start_idx].lower()
+  id = _get_field('4-character id',header,delim=_CSV_DELIM)
   logger.debug('reading csv data for station %s' % id.upper()) 
 
-  start = _get_field('begin date',file_str,delim=delim)
-  pos = _get_line_with('reference position',file_str)
+  pos = _get_line_with('reference position',header)
   lon,lat = pos.split()[5],pos.split()[2]
 
-  data_start_idx = file_str.rfind(start)
-  data = file_str[data_start_idx:]
-  data = np.genfromtxt(data.split('\n'),
-                       converters={0:date_conv},
-                       delimiter=delim,
-                       usecols=(0,1,2,3,4,5,6))
+  time,data = _read_data(file_str,data_start_idx,_CSV_FMT,_CSV_COLUMNS,_CSV_DELIM)
   output = {}
   output['id'] = id.upper()
-  output['longitude'] = np.float(lon)
-  output['latitude'] = np.float(lat)
-  output['time'] = data[:,0].astype(int)
+  output['longitude'] = float(lon)
+  output['latitude'] = float(lat)
+  output['time'] = time
   # comvert from millimeters to meters  
-  output['north'] = 0.001*data[:,1].astype(float)
-  output['east'] = 0.001*data[:,2].astype(float)
-  output['vertical'] = 0.001*data[:,3].astype(float)
-  output['north_std_dev'] = 0.001*data[:,4].astype(float)
-  output['east_std_dev'] = 0.001*data[:,5].astype(float)
-  output['vertical_std_dev'] = 0.001*data[:,6].astype(float)
+  data *= 0.001
+  output['north'] = data[:,0]
+  output['east'] = data[:,1]
+  output['vertical'] = data[:,2]
+  output['north_std_dev'] = data[:,3]
+  output['east_std_dev'] = data[:,4]
+  output['vertical_std_dev'] = data[:,5]
   # indicate that the data are in units of meters
   output['time_exponent'] = 0  
   output['space_exponent'] = 1
@@ -188,40 +250,33 @@ def parse_tdecsv(file_str):
   Reads data from a single data file which has the format used by the 
   SCEC Geodetic Transient Detection Validation Exercise
   '''
-  fmt = '%Y-%m-%d'
-  delim = ','
-
-  def date_conv(date_str): 
-    return float(mjd(date_str,fmt))
-
-  # make everything lowercase so that field searches are not case 
-  # sensitive
   file_str = file_str.strip()
-  file_str = file_str.lower()
-  line_one = file_str[:file_str.find('\n')]
+  # make the first line lowercase so that field searches are not case 
+  # sensitive
+  line_one = file_str[:file_str.find('\n')].lower()
   id = line_one.split(',')[0].split()[1]
   lat = line_one.split(',')[1]
   lon = line_one.split(',')[2]
   data_start_idx = file_str.find('\n') + 1
 
   logger.debug('reading csv data for station %s' % id.upper()) 
-  data = file_str[data_start_idx:]
-  data = np.genfromtxt(data.split('\n'),
-                       converters={0:date_conv},
-                       delimiter=delim,
-                       usecols=(0,1,2,3))
+  time,data = _read_data(file_str,data_start_idx,_CSV_FMT,_TDECSV_COLUMNS,_CSV_DELIM)
   output = {}
   output['id'] = id.upper()
-  output['longitude'] = np.float(lon)
-  output['latitude'] = np.float(lat)
-  output['time'] = data[:,0].astype(int)
+  output['longitude'] = float(lon)
+  output['latitude'] = float(lat)
+  output['time'] = time
   # comvert from millimeters to meters  
-  output['north'] = 0.001*data[:,2].astype(float)
-  output['east'] = 0.001*data[:,1].astype(float)
-  output['vertical'] = 0.001*data[:,3].astype(float)
-  output['north_std_dev'] = 0.001*np.ones(len(data[:,0]))
-  output['east_std_dev'] = 0.001*np.ones(len(data[:,0]))
-  output['vertical_std_dev'] = 0.001*np.ones(len(data[:,0]))
+  data *= 0.001
+  output['north'] = data[:,1]
+  output['east'] = data[:,0]
+  output['vertical'] = data[:,2]
+  # the uncertainties are not given, so use 1 mm for every component. 
+  # The components share one array since it is only read from
+  std = np.full(data.shape[0],0.001)
+  output['north_std_dev'] = std
+  output['east_std_dev'] = std
+  output['vertical_std_dev'] = std
   # indicate that the data are in units of meters
   output['time_exponent'] = 0  
   output['space_exponent'] = 1
@@ -232,37 +287,28 @@ def parse_pbopos(file_str):
   ''' 
   Reads data from a single PBO pos file
   '''
-  fmt = '%Y%m%d'
-
-  def date_conv(date_str): 
-    return float(mjd(date_str,fmt))
-
-  # make everything lowercase so that field searches are not case 
+  data_start_idx = _get_data_start('first epoch',file_str,delim=_POS_DELIM)
+  # make the header lowercase so that field searches are not case 
   # sensitive
-  file_str = file_str.lower()
-  id = _get_field('4-character id',file_str,delim=':')
+  header = file_str[:data_start_idx].lower()
+  id = _get_field('4-character id',header,delim=_POS_DELIM)
   logger.debug('reading pos data for station %s' % id.upper()) 
 
-  start = _get_field('first epoch',file_str,delim=':')
-  pos = _get_field('neu reference position',file_str,delim=':')
+  pos = _get_field('neu reference position',header,delim=_POS_DELIM)
   lon,lat = pos.split()[1],pos.split()[0]
 
-  data_start_idx = file_str.rfind(start)
-  data = file_str[data_start_idx:]
-  data = np.genfromtxt(data.split('\n'),
-                       converters={0:date_conv},
-                       usecols=(0,15,16,17,18,19,20))
+  time,data = _read_data(file_str,data_start_idx,_POS_FMT,_POS_COLUMNS,_POS_DATA_DELIM)
   output = {}
   output['id'] = id.upper()
-  output['longitude'] = np.float(lon)
-  output['latitude'] = np.float(lat)
-  output['time'] = data[:,0].astype(int)
-  output['north'] = data[:,1].astype(float)
-  output['east'] = data[:,2].astype(float)
-  output['vertical'] = data[:,3].astype(float)
-  output['north_std_dev'] = data[:,4].astype(float)
-  output['east_std_dev'] = data[:,5].astype(float)
-  output['vertical_std_dev'] = data[:,6].astype(float)
+  output['longitude'] = float(lon)
+  output['latitude'] = float(lat)
+  output['time'] = time
+  output['north'] = data[:,0]
+  output['east'] = data[:,1]
+  output['vertical'] = data[:,2]
+  output['north_std_dev'] = data[:,3]
+  output['east_std_dev'] = data[:,4]
+  output['vertical_std_dev'] = data[:,5]
   # indicate that the units are in meters
   output['time_exponent'] = 0
   output['space_exponent'] = 1
@@ -275,3 +321,30 @@ PARSER_DICT = {'csv':parse_csv,
                'pbopos':parse_pbopos}
 
 
+def parse_many(strs,parser,workers=0):
+  ''' 
+  Parses the data for multiple stations, optionally in parallel. The 
+  stations are independent, so each one can be parsed by a separate 
+  subprocess. This is only worthwhile for many large station files, 
+  since the subprocesses have a fixed overhead.
+  
+  Parameters
+  ----------
+  strs : list of str
+    Text for each station
+
+  parser : str
+    Name of the parser in *PARSER_DICT*
+
+  workers : int, optional
+    Number of subprocesses to spawn. Defaults to 0, which parses the 
+    stations serially and raises any parser errors directly. See 
+    *pygeons.mp.parmap*.
+    
+  Returns
+  -------
+  out : list of dicts
+    Data dictionary for each station
+
+  '''
+  return parmap(PARSER_DICT[parser],strs,workers=workers)
@@ -31,16 +31,16 @@ def autoclean(t,x,d,sd,
   net_gp = composite(network_model,network_params,gpnetwork.CONSTRUCTORS)
   sta_gp = composite(station_model,station_params,gpstation.CONSTRUCTORS)
 
-  t_grid,x0_grid = np.meshgrid(t,x[:,0],indexing='ij')
-  t_grid,x1_grid = np.meshgrid(t,x[:,1],indexing='ij')
-  # flat observation times and positions
-  z = np.array([t_grid.ravel(),
-                x0_grid.ravel(),
-                x1_grid.ravel()]).T
-
   # mask indicates missing data
   mask = np.isinf(sde)
-  zu,du,sdu = z[~mask.ravel()],de[~mask],sde[~mask]
+  # time and station indices of the unmasked data
+  r,c = np.nonzero(~mask)
+  # flat observation times and positions. Only the unmasked points are 
+  # built. *t* is a (Nt,1) array of observation times
+  zu = np.empty((r.shape[0],3),dtype=float)
+  zu[:,0] = t[r,0]
+  zu[:,1:] = x[c]
+  du,sdu = de[r,c],sde[r,c]
   # Build covariance and basis vectors for the combined process. Do
   # not evaluated at masked points
   sta_sigma,sta_p = station_sigma_and_p(sta_gp,t,mask)
@@ -56,7 +56,6 @@ def autoclean(t,x,d,sd,
                      mu=mu,sigma=sigma,p=p,
                      tol=tol)
   # mask the outliers in *de* and *sde*
-  r,c = np.nonzero(~mask)
   de[r[out_idx],c[out_idx]] = np.nan
   sde[r[out_idx],c[out_idx]] = np.inf
   return (de,sde)
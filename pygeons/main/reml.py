@@ -4,7 +4,8 @@ hyperparameter estimation.
 '''
 import numpy as np
 import logging
-from scipy.optimize import fmin
+from functools import wraps
+from scipy.optimize import minimize
 from pygeons.main import gpnetwork
 from pygeons.main import gpstation
 from pygeons.main.gptools import (composite,
@@ -15,14 +16,46 @@ from rbf.gauss import (_as_covariance,
 logger = logging.getLogger(__name__)
 
 
+def _memoize_last(fin):
+  ''' 
+  Memoizes *fin* with only the result for the most recent arguments. 
+  This is used for functions that return large matrices, which would 
+  use too much memory if every result was kept.
+  '''
+  cache = {}
+  @wraps(fin)
+  def fout(*args):
+    if args not in cache:
+      cache.clear()
+      cache[args] = fin(*args)
+
+    return cache[args]
+
+  return fout
+
+
 def fmax_pos(func,x0,*args,**kwargs):
   '''maximize the function with positivity constraint'''
   def pos_func(x,*blargs):
     return -func(np.exp(x),*blargs)
 
-  xopt,fopt,_,_,_ = fmin(pos_func,np.log(x0),*args,full_output=True,**kwargs)
-  xopt = np.exp(xopt)
-  fopt = -fopt
+  x0 = np.asarray(x0,dtype=float)
+  if x0.size == 0:
+    # there are no free parameters, so just evaluate the function. 
+    # Nelder-Mead never evaluates the function for an empty simplex
+    return x0,func(x0,*args)
+
+  # use the adaptive Nelder-Mead method, which scales the simplex 
+  # updates with the number of dimensions. The adaptive shrink 
+  # coefficient is zero for one dimension, so the standard coefficients 
+  # are used in that case. The tolerances are the same as the defaults 
+  # for *fmin*
+  options = {'adaptive':x0.size > 1,'xatol':1e-4,'fatol':1e-4}
+  options.update(kwargs)
+  res = minimize(pos_func,np.log(x0),args=args,
+                 method='Nelder-Mead',options=options)
+  xopt = np.exp(res.x)
+  fopt = -res.fun
   return xopt,fopt
 
 
@@ -43,45 +76,85 @@ def reml(t,x,d,sd,
   sd = np.array(sd,dtype=float)
   diff = np.array([0,0,0])
 
-  t_grid,x0_grid = np.meshgrid(t,x[:,0],indexing='ij')
-  t_grid,x1_grid = np.meshgrid(t,x[:,1],indexing='ij')
-  # flat observation times and positions
-  z = np.array([t_grid.ravel(),
-                x0_grid.ravel(),
-                x1_grid.ravel()]).T
-
   # mask indicates missing data
   mask = np.isinf(sd)
-  z,d,sd = z[~mask.ravel()],d[~mask],sd[~mask]
+  # time and station indices of the unmasked data
+  r,c = np.nonzero(~mask)
+  # flat observation times and positions. Only the unmasked points are 
+  # built. *t* is a (Nt,1) array of observation times
+  z = np.empty((r.shape[0],3),dtype=float)
+  z[:,0] = t[r,0]
+  z[:,1:] = x[c]
+  d,sd = d[r,c],sd[r,c]
   # number of network hyperparameters
   n = len(network_params)
   # combined network and station parameters
   params = np.hstack((network_params,station_params))
   fix = np.hstack((network_fix,station_fix+n))
-  free = np.array([i for i in range(len(params)) if i not in fix],dtype=int)
-  
-  def objective(theta):
-    logger.debug('Current hyperparameters : ' + ' '.join('%0.4e' % i for i in theta))
-    test_params = np.copy(params)
-    test_params[free] = theta 
-    test_network_params = test_params[:n]
-    test_station_params = test_params[n:]
+  free_mask = np.ones(len(params),dtype=bool)
+  free_mask[fix] = False
+  free = np.flatnonzero(free_mask)
+  # buffer for the hyperparameters being tested. The fixed
+  # hyperparameters never change, so only the free hyperparameters
+  # need to be updated in *objective*
+  test_params = np.copy(params)
+  # the data noise and the prior mean do not depend on the 
+  # hyperparameters
+  obs_sigma = _as_covariance(sd)
+  mu = np.zeros(z.shape[0])
+  # buffer for the combined station and network basis vectors. This is 
+  # only reallocated if the number of basis vectors changes
+  p_buff = [np.empty((z.shape[0],0))]
+
+  # The arguments for these functions are tuples so that they are 
+  # hashable and can be memoized
+  def network_sigma_and_p(test_network_params):
+    # network process
     net_gp = composite(network_model,test_network_params,gpnetwork.CONSTRUCTORS)
-    sta_gp = composite(station_model,test_station_params,gpstation.CONSTRUCTORS)
+    net_sigma = net_gp._covariance(z,z,diff,diff)
+    net_p = net_gp._basis(z,diff)
+    return net_sigma,net_p
+
+  if not np.any(free < n):
+    # all the network hyperparameters are fixed, so the network 
+    # matrices only need to be built once. Otherwise, do not memoize 
+    # because the cache would hold on to the dense network covariance 
+    # matrix while the likelihood is being computed
+    network_sigma_and_p = _memoize_last(network_sigma_and_p)
+
+  def station_noise_sigma_and_p(test_station_params):
     # station process
+    sta_gp = composite(station_model,test_station_params,gpstation.CONSTRUCTORS)
     sta_sigma,sta_p = station_sigma_and_p(sta_gp,t,mask)
     # add data noise to the diagonals of sta_sigma. Both matrices are
     # sparse so this is efficient
-    obs_sigma = _as_covariance(sd)
     sta_sigma = as_sparse_or_array(sta_sigma + obs_sigma)
+    return sta_sigma,sta_p
+
+  if not np.any(free >= n):
+    # all the station hyperparameters are fixed. The station covariance 
+    # matrix can be dense, so it is also only memoized in this case
+    station_noise_sigma_and_p = _memoize_last(station_noise_sigma_and_p)
+  
+  def objective(theta):
+    logger.debug('Current hyperparameters : ' + ' '.join('%0.4e' % i for i in theta))
+    test_params[free] = theta 
+    test_network_params = test_params[:n]
+    test_station_params = test_params[n:]
+    # station process and data noise
+    sta_sigma,sta_p = station_noise_sigma_and_p(tuple(test_station_params))
     # network process
-    net_sigma = net_gp._covariance(z,z,diff,diff)
-    net_p = net_gp._basis(z,diff)
+    net_sigma,net_p = network_sigma_and_p(tuple(test_network_params))
     # combine station gp with the network gp
-    mu = np.zeros(z.shape[0])
     sigma = as_sparse_or_array(sta_sigma + net_sigma)
-    p = np.hstack((sta_p,net_p))
-    del sta_sigma,net_sigma,obs_sigma,sta_p,net_p
+    Ns,Nn = sta_p.shape[1],net_p.shape[1]
+    if p_buff[0].shape[1] != (Ns + Nn):
+      p_buff[0] = np.empty((z.shape[0],Ns + Nn))
+
+    p = p_buff[0]
+    p[:,:Ns] = sta_p
+    p[:,Ns:] = net_p
+    del sta_sigma,net_sigma,sta_p,net_p
     try:
       out = likelihood(d,mu,sigma,p=p)
     except np.linalg.LinAlgError as err:
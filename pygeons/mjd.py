@@ -11,6 +11,8 @@ from datetime import datetime,timedelta
 import numpy as np
 
 _REFERENCE_DATETIME = datetime(1858,11,17,0,0)
+# MJD of the numpy datetime64 epoch, January 1, 1970
+_EPOCH_MJD = 40587
 
 def _memoize(fin):
   cache = {}
@@ -48,6 +50,71 @@ def mjd(s,fmt):
   return out
 
 
+def _datetime64_array(s,fmt):
+  ''' 
+  Converts an array of date strings into datetime64 dates with 
+  vectorized arithmetic. This only supports zero padded dates with the 
+  formats "%Y-%m-%d" and "%Y%m%d". None is returned if *fmt* is not 
+  supported or if any of the dates do not convert back into their 
+  original strings, which is the case for non-padded or invalid dates
+  '''
+  try:
+    if fmt == '%Y-%m-%d':
+      d = s.astype('datetime64[D]')
+      s_inv = d.astype(str)
+    elif fmt == '%Y%m%d':
+      # break the dates into years, months, and days and then add them 
+      # up as datetime64 offsets from the epoch
+      i = s.astype(np.int64)
+      d = (i//10000 - 1970).astype('datetime64[Y]')
+      d = d.astype('datetime64[M]') + (i//100 % 100 - 1)
+      d = d.astype('datetime64[D]') + (i % 100 - 1)
+      # invalid months and days roll over into the next month or year, 
+      # so they do not match after converting back to a string
+      s_inv = np.char.replace(d.astype(str),'-','')
+    else:
+      return None
+
+  except ValueError:
+    return None
+
+  if not np.all(s_inv == s):
+    return None
+
+  return d
+
+
+def mjd_array(s,fmt):
+  ''' 
+  Converts an array of date strings into Modified Julian Dates. This 
+  is done with vectorized datetime64 arithmetic when *fmt* is 
+  "%Y-%m-%d" or "%Y%m%d" and the dates are zero padded. Otherwise, 
+  *mjd* is called for each element, so the dates are parsed exactly as 
+  they would be by *mjd*.
+  
+  Parameters
+  ----------
+  s : (N,) array of strings
+    Date strings
+
+  fmt : string
+    Format string indicating how to parse *s*
+      
+  Returns
+  -------
+  out : (N,) int array
+    Modified Julian Dates
+
+  '''
+  s = np.asarray(s)
+  d = _datetime64_array(s,fmt)
+  if d is None:
+    return np.array([mjd(i,fmt) for i in s],dtype=np.int64)
+
+  out = d.astype(np.int64) + _EPOCH_MJD
+  return out
+
+
 @_memoize
 def mjd_inv(m,fmt):
   ''' 
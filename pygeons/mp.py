@@ -133,14 +133,15 @@ def parmap(f,args,workers=None):
   q_out.close()
   q_err.close()
 
+  # reset the number of threads to its original value. Do this before 
+  # raising any errors
+  if _HAS_MKL:
+    mkl.set_num_threads(starting_threads)
+    
   # raise an error if any were found
   if any([e is not None for e in err_list]):
     raise ParmapError(err_list)
 
-  # reset the number of threads to its original value
-  if _HAS_MKL:
-    mkl.set_num_threads(starting_threads)
-    
   return val_list
 
 
@@ -6,7 +6,6 @@ from matplotlib.colors import ListedColormap
 from code import InteractiveConsole
 import logging
 import sys
-import scipy.interpolate
 from scipy.spatial import cKDTree
 from textwrap import wrap
 try:
@@ -27,26 +26,42 @@ def _roll(lst):
   return out
 
 
-def _grid_interp_data(u,pnts,x,y):
-  u = np.asarray(u)
-  pnts = np.asarray(pnts)
-  x = np.asarray(x)  
-  y = np.asarray(y)
-
-  pnts = pnts[np.isfinite(u)]
-  u = u[np.isfinite(u)] 
-  # return an array of zeros if all data is masked or if there is no 
-  # data
-  if pnts.shape[0] == 0:
-    return np.zeros((x.shape[0],y.shape[0]))
-        
-  xg,yg = np.meshgrid(x,y)
-  xf,yf = xg.flatten(),yg.flatten()
-  pnts_itp = np.array([xf,yf]).T
-  I = scipy.interpolate.NearestNDInterpolator(pnts,u)
-  uitp = I(pnts_itp)
-  uitp = uitp.reshape((x.shape[0],y.shape[0]))                   
-  return uitp
+class _GridInterpolant(object):
+  ''' 
+  Nearest neighbor interpolant which maps data at *pnts* onto the grid 
+  defined by *x* and *y*. The grid and the nearest neighbors are only 
+  recomputed when the pattern of missing data changes, which makes it 
+  cheap to evaluate for each time step.
+  '''
+  def __init__(self,pnts,x,y):
+    self.pnts = np.asarray(pnts)
+    x = np.asarray(x)  
+    y = np.asarray(y)
+    self.shape = (x.shape[0],y.shape[0])
+    xg,yg = np.meshgrid(x,y)
+    self.pnts_itp = np.array([xg.flatten(),yg.flatten()]).T
+    # finite data from the previous call and the indices of the 
+    # nearest finite data for each grid point
+    self._finite = None
+    self._nearest = None
+
+  def __call__(self,u):
+    u = np.asarray(u)
+    finite = np.isfinite(u)
+    # return an array of zeros if all data is masked or if there is no 
+    # data
+    if not np.any(finite):
+      return np.zeros(self.shape)
+
+    if (self._finite is None) or np.any(finite != self._finite):
+      T = cKDTree(self.pnts[finite])
+      _,idx = T.query(self.pnts_itp)
+      self._finite = finite
+      self._nearest = np.nonzero(finite)[0][idx]
+
+    uitp = u[self._nearest]
+    uitp = uitp.reshape(self.shape)
+    return uitp
   
 
 def one_sigfig(val):
@@ -570,8 +585,10 @@ Notes :
                   np.linspace(self.map_ylim[0],
                               self.map_ylim[1],
                               self.image_resolution)]
-    data_itp = _grid_interp_data(self.data_sets[0][self.tidx,:,2],
-                                 self.x,self.x_itp[0],self.x_itp[1])
+    self._image_interp = _GridInterpolant(self.x,
+                                          self.x_itp[0],
+                                          self.x_itp[1])
+    data_itp = self._image_interp(self.data_sets[0][self.tidx,:,2])
     if self.image_clim is None:
       # if vmin and vmax are None then the color bounds will be 
       # updated each time the artists are redrawn
@@ -608,8 +625,7 @@ Notes :
     # Update the vertical deformation image for changes in *tidx* or 
     # *xidx*. This changes the data for the image and updates the 
     # colorbar
-    data_itp = _grid_interp_data(self.data_sets[0][self.tidx,:,2],
-                                 self.x,self.x_itp[0],self.x_itp[1])
+    data_itp = self._image_interp(self.data_sets[0][self.tidx,:,2])
     self.image.set_data(data_itp)
     if self.image_clim is None:
       # *image_clim* are the user specified color bounds. if they are 
@@ -903,6 +919,16 @@ Notes :
     self.ts_fig.canvas.draw()
     self.map_fig.canvas.draw()
 
+  def update_map(self):
+    # Calls the _update functions for the map view artists and only 
+    # redraws the map view figure. Use this when only *tidx* has 
+    # changed, since the time series do not depend on *tidx*.
+    self._update_map_ax()
+    self._update_quiver()
+    self._update_image()
+    self._update_scatter()
+    self.map_fig.canvas.draw()
+
   def hard_update(self):
     # Removes all artists and replots them. This is slower but it 
     # properly updates the figures for any changes to the configurable 
@@ -919,7 +945,7 @@ Notes :
     Nt = self.data_sets[0].shape[0]
     for i in range(Nt):
       self.tidx = i
-      self.update()
+      self.update_map()
       fname = '%06d.jpeg' % i
       logger.info('saving file %s/%s' % (dir,fname))
       plt.savefig(dir+'/'+fname)
@@ -937,27 +963,27 @@ Notes :
     # This function is called when a key is pressed
     if event.key == 'right':
       self.tidx += 1
-      self.update()
+      self.update_map()
 
     elif event.key == 'ctrl+right':
       self.tidx += 10
-      self.update()
+      self.update_map()
 
     elif event.key == 'alt+right':
       self.tidx += 100
-      self.update()
+      self.update_map()
 
     elif event.key == 'left':
       self.tidx -= 1
-      self.update()
+      self.update_map()
 
     elif event.key == 'ctrl+left':
       self.tidx -= 10
-      self.update()
+      self.update_map()
 
     elif event.key == 'alt+left':
       self.tidx -= 100
-      self.update()
+      self.update_map()
 
     elif event.key == 'up':
       self.xidx += 1